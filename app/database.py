@@ -6,7 +6,19 @@ from typing import Generator
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Pool sized for burst event ingest from many cameras - the default 5/10
+# pool serializes concurrent polling loops and request handlers under load.
+# pool_pre_ping discards connections dropped by PG idle timeouts before a
+# query fails on them; pool_recycle bounds connection age below common
+# firewall/LB idle cutoffs.
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=20,
+    max_overflow=40,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
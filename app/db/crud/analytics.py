@@ -1,18 +1,37 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
+import logging
+from sqlalchemy import JSON, bindparam, cast, delete, func, lambda_stmt, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload, raiseload, undefer
 from typing import List, Optional, Dict, Any
 from app.db.models.analytics import Analytics
-from app.db.models.camera import Camera
+from app.db.models.camera import Camera, camera_analytics
 from app.db.schemas.analytics import AnalyticsCreate, AnalyticsUpdate
 
+logger = logging.getLogger(__name__)
+
+# Cached statement for the per-request PK lookup: lambda_stmt caches the
+# compiled SQL across calls, so repeat lookups skip statement compilation
+_GET_ANALYTICS_STMT = lambda_stmt(
+    lambda: select(Analytics).options(
+        undefer(Analytics.config)
+    ).where(Analytics.id == bindparam("id"))
+)
+
 def get_analytics(db: Session, analytics_id: int) -> Optional[Analytics]:
-    return db.query(Analytics).filter(Analytics.id == analytics_id).first()
+    return db.execute(_GET_ANALYTICS_STMT, {"id": analytics_id}).scalar_one_or_none()
 
 def get_analytics_by_type(db: Session, analytics_type: str) -> Optional[Analytics]:
-    return db.query(Analytics).filter(Analytics.type == analytics_type).first()
+    return db.query(Analytics).options(
+        undefer(Analytics.config)
+    ).filter(Analytics.type == analytics_type).first()
 
 def get_all_analytics(db: Session, skip: int = 0, limit: int = 100) -> List[Analytics]:
-    return db.query(Analytics).offset(skip).limit(limit).all()
+    # The list route serializes config for every row, so load it up front -
+    # leaving it deferred here would mean one lazy SELECT per row instead
+    return db.query(Analytics).options(
+        undefer(Analytics.config)
+    ).offset(skip).limit(limit).all()
 
 def create_analytics(db: Session, analytics: AnalyticsCreate) -> Analytics:
     db_analytics = Analytics(**analytics.model_dump())
@@ -22,43 +41,60 @@ def create_analytics(db: Session, analytics: AnalyticsCreate) -> Analytics:
     return db_analytics
 
 def update_analytics(
-    db: Session, 
-    analytics_id: int, 
+    db: Session,
+    analytics_id: int,
     analytics: AnalyticsUpdate
 ) -> Optional[Analytics]:
-    db_analytics = get_analytics(db, analytics_id)
-    if db_analytics:
-        # Use exclude_unset=False to ensure config is always included if provided
-        update_data = analytics.model_dump(exclude_unset=False)
-        print(f"🔍 CRUD: Raw update_data keys: {list(update_data.keys())}")
-        print(f"🔍 CRUD: Config in update_data: {'config' in update_data}, value: {update_data.get('config')}")
-        
-        # Special handling for config - always update if provided (even if None)
-        if "config" in update_data:
-            new_config = update_data["config"]
-            if new_config is not None:
-                # Merge with existing config to preserve other fields
-                existing_config = db_analytics.config or {}
-                print(f"🔍 CRUD: Existing config: {existing_config}")
-                print(f"🔍 CRUD: New config: {new_config}")
-                # Merge configs (new values override existing)
-                merged_config = {**existing_config, **new_config}
-                print(f"🔍 CRUD: Merged config: {merged_config}")
-                db_analytics.config = merged_config
-                # CRITICAL: SQLAlchemy doesn't detect changes to nested JSON dicts
-                # We must explicitly flag the column as modified
-                flag_modified(db_analytics, "config")
-                print(f"🔍 CRUD: Flagged config as modified")
-            # Remove from update_data to avoid double-setting
-            del update_data["config"]
-        
-        for field, value in update_data.items():
-            if value is not None:  # Only update non-None fields
-                setattr(db_analytics, field, value)
-        
-        db.commit()
-        db.refresh(db_analytics)
-        print(f"🔍 CRUD: After commit, config in DB: {db_analytics.config}")
+    # Use exclude_unset=False to ensure config is always included if provided
+    update_data = analytics.model_dump(exclude_unset=False)
+    # isEnabledFor gate: building the keys list is wasted work when DEBUG is off
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("update_analytics: update_data keys=%s, config=%s",
+                     list(update_data.keys()), update_data.get("config"))
+
+    new_config = update_data.pop("config", None)
+    values = {field: value for field, value in update_data.items() if value is not None}
+    merged_config = None
+    if new_config is not None:
+        # Merge configs on the DB side with jsonb || (new values override
+        # existing). One atomic UPDATE replaces the old SELECT + Python
+        # merge + flag_modified + commit + refresh cycle and closes the
+        # lost-update window between concurrent workers.
+        merged_config = func.coalesce(
+            cast(Analytics.config, JSONB), cast("{}", JSONB)
+        ).concat(cast(new_config, JSONB))
+        values["config"] = cast(merged_config, JSON)
+
+    if not values:
+        # Nothing to change - just return the current row
+        return get_analytics(db, analytics_id)
+
+    config_only = new_config is not None and len(values) == 1
+
+    stmt = (
+        update(Analytics)
+        .where(Analytics.id == analytics_id)
+        .values(**values)
+        .returning(Analytics)
+    )
+    if config_only:
+        # Skip the write only when the merged result equals the stored
+        # config - idempotent PUT/PATCH (e.g. UI auto-save) then generates
+        # no WAL traffic. Note @> would be wrong here: containment is
+        # recursive while || merges shallowly, so a patch whose nested dict
+        # is a subset of the stored one would look like a no-op even though
+        # the merge replaces that dict.
+        stmt = stmt.where(
+            merged_config.is_distinct_from(cast(Analytics.config, JSONB))
+        )
+
+    db_analytics = db.execute(
+        stmt, execution_options={"populate_existing": True}
+    ).scalar_one_or_none()
+    db.commit()
+    if db_analytics is None and config_only:
+        # Row missing or patch was a no-op - return whatever is there
+        return get_analytics(db, analytics_id)
     return db_analytics
 
 def delete_analytics(db: Session, analytics_id: int) -> bool:
@@ -70,36 +106,66 @@ def delete_analytics(db: Session, analytics_id: int) -> bool:
     return False
 
 def get_camera_analytics(db: Session, camera_id: int) -> List[Analytics]:
-    return db.query(Analytics).join(
-        Analytics.cameras
+    # Eager-load cameras in one extra SELECT and raise on any other lazy
+    # relationship access so callers can't silently trigger N+1 queries
+    return db.query(Analytics).options(
+        selectinload(Analytics.cameras),
+        undefer(Analytics.config),
+        raiseload('*')
     ).filter(
         Analytics.cameras.any(id=camera_id)
     ).all()
 
+def get_camera_analytic_by_type(
+    db: Session,
+    camera_id: int,
+    analytics_type: str
+) -> Optional[Analytics]:
+    # Targeted single-row lookup: the DB filters on (camera_id, type)
+    # instead of callers loading every analytics row for the camera and
+    # scanning for the wanted type in Python
+    return db.query(Analytics).join(
+        camera_analytics, camera_analytics.c.analytics_id == Analytics.id
+    ).filter(
+        camera_analytics.c.camera_id == camera_id,
+        Analytics.type == analytics_type
+    ).options(undefer(Analytics.config)).first()
+
 def add_analytics_to_camera(
-    db: Session, 
-    camera_id: int, 
+    db: Session,
+    camera_id: int,
     analytics_id: int
 ) -> bool:
-    camera = db.query(Camera).filter(Camera.id == camera_id).first()
-    analytics = get_analytics(db, analytics_id)
-    
-    if camera and analytics:
-        camera.analytics.append(analytics)
+    # Insert straight into the association table instead of loading both
+    # ORM objects first - one round-trip instead of three. The FK
+    # constraints reject unknown ids and ON CONFLICT absorbs duplicates.
+    stmt = pg_insert(camera_analytics).values(
+        camera_id=camera_id,
+        analytics_id=analytics_id
+    ).on_conflict_do_nothing()
+    try:
+        db.execute(stmt)
         db.commit()
-        return True
-    return False
+    except IntegrityError:
+        # Unknown camera or analytics id
+        db.rollback()
+        return False
+    # rowcount is 0 when the link already existed (ON CONFLICT DO NOTHING);
+    # the pair is linked either way, so report idempotent success rather
+    # than letting callers turn an existing link into a 404
+    return True
 
 def remove_analytics_from_camera(
-    db: Session, 
-    camera_id: int, 
+    db: Session,
+    camera_id: int,
     analytics_id: int
 ) -> bool:
-    camera = db.query(Camera).filter(Camera.id == camera_id).first()
-    analytics = get_analytics(db, analytics_id)
-    
-    if camera and analytics:
-        camera.analytics.remove(analytics)
-        db.commit()
-        return True
-    return False 
\ No newline at end of file
+    # Delete the link row directly - no need to load camera and analytics
+    result = db.execute(
+        delete(camera_analytics).where(
+            camera_analytics.c.camera_id == camera_id,
+            camera_analytics.c.analytics_id == analytics_id
+        )
+    )
+    db.commit()
+    return result.rowcount > 0 
\ No newline at end of file
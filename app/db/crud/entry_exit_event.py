@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, text, delete, select, bindparam, lambda_stmt
 from typing import List, Optional, Dict
-from datetime import datetime, date
+from datetime import datetime, date, time, timedelta
 from app.db.models.entry_exit_event import EntryExitEvent
+from app.db.models.camera import Camera
 from app.db.schemas.entry_exit_event import EntryExitEventCreate
 
 def create_entry_exit_event(db: Session, event: EntryExitEventCreate) -> EntryExitEvent:
@@ -13,6 +14,41 @@ def create_entry_exit_event(db: Session, event: EntryExitEventCreate) -> EntryEx
     db.refresh(db_event)
     return db_event
 
+def create_entry_exit_events_bulk(db: Session, events: List[EntryExitEventCreate]) -> int:
+    """
+    Create many entry/exit events in a single round-trip.
+
+    Uses bulk_insert_mappings so all rows go out as one multi-values INSERT
+    and a single commit, instead of one INSERT+commit per event. The bulk
+    path skips refresh — callers that need generated IDs should use
+    create_entry_exit_event instead. Returns the number of inserted rows.
+    """
+    if not events:
+        return 0
+    db.bulk_insert_mappings(EntryExitEvent, [event.model_dump() for event in events])
+    db.commit()
+    return len(events)
+
+def create_entry_exit_events_bulk_epoch(db: Session, rows: List[Dict]) -> int:
+    """
+    Bulk-create events from mapping dicts whose "timestamp" holds epoch
+    seconds (float).
+
+    Companion to create_entry_exit_events_bulk for hot paths that buffer
+    events as plain floats: the datetime objects are only materialized
+    here, once per row at insert time, instead of one allocation per event
+    at detection time. Mutates the passed rows in place; callers are
+    expected to discard them afterwards. Returns the number of inserted
+    rows.
+    """
+    if not rows:
+        return 0
+    for row in rows:
+        row["timestamp"] = datetime.fromtimestamp(row["timestamp"])
+    db.bulk_insert_mappings(EntryExitEvent, rows)
+    db.commit()
+    return len(rows)
+
 def get_entry_exit_events(
     db: Session,
     camera_id: Optional[int] = None,
@@ -35,9 +71,14 @@ def get_entry_exit_events(
     
     return query.order_by(EntryExitEvent.timestamp.desc()).offset(skip).limit(limit).all()
 
+# Cached statement for the PK lookup (see _GET_ANALYTICS_STMT in analytics.py)
+_GET_EVENT_STMT = lambda_stmt(
+    lambda: select(EntryExitEvent).where(EntryExitEvent.id == bindparam("event_id"))
+)
+
 def get_entry_exit_event(db: Session, event_id: int) -> Optional[EntryExitEvent]:
     """Get a specific entry/exit event by ID"""
-    return db.query(EntryExitEvent).filter(EntryExitEvent.id == event_id).first()
+    return db.execute(_GET_EVENT_STMT, {"event_id": event_id}).scalar_one_or_none()
 
 def delete_entry_exit_event(db: Session, event_id: int) -> bool:
     """Delete an entry/exit event"""
@@ -50,9 +91,12 @@ def delete_entry_exit_event(db: Session, event_id: int) -> bool:
 
 def delete_entry_exit_events_by_camera(db: Session, camera_id: int) -> int:
     """Delete all entry/exit events for a camera. Returns the number of deleted events."""
-    deleted_count = db.query(EntryExitEvent).filter(EntryExitEvent.camera_id == camera_id).delete()
+    # Core DELETE with synchronize_session=False skips the session-state
+    # scan the Query default performs - nothing here holds event objects
+    stmt = delete(EntryExitEvent).where(EntryExitEvent.camera_id == camera_id)
+    result = db.execute(stmt.execution_options(synchronize_session=False))
     db.commit()
-    return deleted_count
+    return result.rowcount
 
 def get_entry_exit_counts_by_camera(
     db: Session,
@@ -68,54 +112,46 @@ def get_entry_exit_counts_by_camera(
         camera_id: Optional camera ID to filter by
     
     Returns:
-        List of dicts with keys: camera_id, enter_count, exit_count, total_count
+        List of dicts with keys: camera_id, camera_name, camera_location,
+        enter_count, exit_count, total_count
     """
-    # Default to today if no date provided
+    # Half-open [start, start + 1 day) range (UTC) - avoids excluding events
+    # in the last microsecond of the day and keeps the predicate index-friendly
     if target_date is None:
-        target_date = datetime.utcnow().date()
+        # Default to "today" computed on the DB server in UTC - the bound
+        # expression is identical across requests and workers, so prepared
+        # statements stay reusable and there is no Python clock call
+        start_datetime = func.date_trunc('day', func.timezone('UTC', func.now()))
+        end_datetime = start_datetime + text("interval '1 day'")
+    else:
+        start_datetime = datetime.combine(target_date, time.min)
+        end_datetime = start_datetime + timedelta(days=1)
     
-    # Start and end of the target date (UTC)
-    start_datetime = datetime.combine(target_date, datetime.min.time())
-    end_datetime = datetime.combine(target_date, datetime.max.time())
-    
-    # Base query
+    # Pivot enter/exit into columns in SQL so only one row per camera
+    # crosses the DBAPI boundary and no Python-side aggregation is needed.
+    # Camera name/location ride along via the join, so callers don't have
+    # to issue one get_camera query per result row (N+1).
     query = db.query(
         EntryExitEvent.camera_id,
-        EntryExitEvent.event,
-        func.count(EntryExitEvent.id).label('count')
+        Camera.name.label('camera_name'),
+        Camera.location.label('camera_location'),
+        func.sum(case((EntryExitEvent.event == 'enter', 1), else_=0)).label('enter_count'),
+        func.sum(case((EntryExitEvent.event == 'exit', 1), else_=0)).label('exit_count'),
+        func.count(EntryExitEvent.id).label('total_count')
+    ).join(
+        Camera, Camera.id == EntryExitEvent.camera_id
     ).filter(
         EntryExitEvent.timestamp >= start_datetime,
-        EntryExitEvent.timestamp <= end_datetime
+        EntryExitEvent.timestamp < end_datetime
     )
-    
+
     # Filter by camera if provided
     if camera_id is not None:
         query = query.filter(EntryExitEvent.camera_id == camera_id)
-    
-    # Group by camera_id and event type
-    query = query.group_by(EntryExitEvent.camera_id, EntryExitEvent.event)
-    
-    results = query.all()
-    
-    # Aggregate results by camera_id
-    camera_counts: Dict[int, Dict] = {}
-    
-    for camera_id, event_type, count in results:
-        if camera_id not in camera_counts:
-            camera_counts[camera_id] = {
-                'camera_id': camera_id,
-                'enter_count': 0,
-                'exit_count': 0,
-                'total_count': 0
-            }
-        
-        if event_type == 'enter':
-            camera_counts[camera_id]['enter_count'] = count
-        elif event_type == 'exit':
-            camera_counts[camera_id]['exit_count'] = count
-        
-        camera_counts[camera_id]['total_count'] += count
-    
-    # Convert to list and sort by camera_id
-    return sorted(camera_counts.values(), key=lambda x: x['camera_id'])
+
+    query = query.group_by(
+        EntryExitEvent.camera_id, Camera.name, Camera.location
+    ).order_by(EntryExitEvent.camera_id)
+
+    return [dict(row._mapping) for row in query.all()]
 
@@ -0,0 +1,36 @@
+"""
+Database migration to add indexes on entry_exit_events for camera/time queries
+"""
+from sqlalchemy import text
+from app.database import engine
+
+def upgrade():
+    """Add (camera_id, timestamp) and (timestamp) indexes to entry_exit_events"""
+
+    with engine.begin() as conn:
+        # Composite index for per-camera time-range queries ordered by timestamp
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_eee_camera_ts
+            ON entry_exit_events (camera_id, timestamp)
+        """))
+
+        # Timestamp index for cross-camera time-range filters
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_eee_ts
+            ON entry_exit_events (timestamp)
+        """))
+
+        print("✅ Added entry_exit_events indexes (camera_id, timestamp) and (timestamp)")
+
+def downgrade():
+    """Remove entry_exit_events indexes"""
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_eee_camera_ts"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_eee_ts"))
+
+        print("✅ Removed entry_exit_events indexes")
+
+if __name__ == "__main__":
+    print("Running database migration for entry/exit event indexes...")
+    upgrade()
+    print("Migration completed successfully!")
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
 from datetime import datetime
 from app.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 class Analytics(Base):
     __tablename__ = "analytics"
@@ -9,7 +9,10 @@ class Analytics(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # e.g., "People Counting", "Dwell Time", "Line Crossing"
     type = Column(String, nullable=False)  # e.g., "people_counting", "dwell_time", "line_crossing"
-    config = Column(JSON, nullable=True)   # Store analytics-specific configuration
+    # Store analytics-specific configuration. Deferred: configs can be KBs of
+    # JSON, so queries that only need id/type/is_active skip marshalling it;
+    # paths that read config opt in with undefer (see app/db/crud/analytics.py)
+    config = deferred(Column(JSON, nullable=True))
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
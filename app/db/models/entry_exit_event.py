@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from datetime import datetime
 from app.database import Base
 
@@ -12,6 +12,13 @@ class EntryExitEvent(Base):
     track_id = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Queries filter on (camera_id, timestamp range) and order by timestamp DESC,
+    # so index the composite plus timestamp alone for cross-camera time filters
+    __table_args__ = (
+        Index("ix_eee_camera_ts", "camera_id", "timestamp"),
+        Index("ix_eee_ts", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<EntryExitEvent(id={self.id}, camera_id={self.camera_id}, event='{self.event}', track_id={self.track_id})>"
 
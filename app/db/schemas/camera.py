@@ -1,7 +1,29 @@
 from pydantic import BaseModel, HttpUrl, ConfigDict
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from app.db.utils import should_defer_vehicle_tracking
+from app.db.utils import invalidate_column_cache, should_defer_vehicle_tracking
+
+# Resolved once at import: whether vehicle tracking columns are missing from
+# this deployment. Checking per model_validate call costs a function call,
+# cache lookup and branch for every serialized camera - on list endpoints
+# that's hundreds of superfluous checks per request.
+_DEFER_VEHICLE_TRACKING: bool = should_defer_vehicle_tracking()
+
+
+def refresh_defer_flag():
+    """
+    Re-resolve the cached vehicle tracking defer flag.
+
+    Call after running a migration that adds/removes the vehicle tracking
+    columns so the schemas pick up the new shape without a restart. The
+    column cache must be dropped first - should_defer_vehicle_tracking
+    would otherwise just re-read the stale pre-migration answer.
+    """
+    global _DEFER_VEHICLE_TRACKING
+    invalidate_column_cache()
+    _DEFER_VEHICLE_TRACKING = should_defer_vehicle_tracking()
+    _install_validators()
+
 
 class CameraBase(BaseModel):
     name: str
@@ -37,12 +59,12 @@ class CameraInDB(CameraBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
-    
+
     @classmethod
     def model_validate(cls, obj, **kwargs):
         """Override to handle missing vehicle tracking attributes gracefully"""
         # If vehicle tracking columns don't exist, set defaults using getattr
-        if should_defer_vehicle_tracking():
+        if _DEFER_VEHICLE_TRACKING:
             # Use getattr with sentinel to check without triggering lazy load
             _sentinel = object()
             if getattr(obj, 'vehicle_tracking_enabled', _sentinel) is _sentinel:
@@ -55,12 +77,12 @@ class CameraOut(CameraBase):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
-    
+
     @classmethod
     def model_validate(cls, obj, **kwargs):
         """Override to handle missing vehicle tracking attributes gracefully"""
         # If vehicle tracking columns don't exist, set defaults using getattr
-        if should_defer_vehicle_tracking():
+        if _DEFER_VEHICLE_TRACKING:
             # Use getattr with sentinel to check without triggering lazy load
             _sentinel = object()
             if getattr(obj, 'vehicle_tracking_enabled', _sentinel) is _sentinel:
@@ -74,12 +96,12 @@ class CameraRead(CameraBase):
     analytics_config: Optional[Dict] = {}
 
     model_config = ConfigDict(from_attributes=True)
-    
+
     @classmethod
     def model_validate(cls, obj, **kwargs):
         """Override to handle missing vehicle tracking attributes gracefully"""
         # If vehicle tracking columns don't exist, set defaults using getattr
-        if should_defer_vehicle_tracking():
+        if _DEFER_VEHICLE_TRACKING:
             # Use getattr with sentinel to check without triggering lazy load
             _sentinel = object()
             if getattr(obj, 'vehicle_tracking_enabled', _sentinel) is _sentinel:
@@ -87,3 +109,21 @@ class CameraRead(CameraBase):
             if getattr(obj, 'vehicle_tracking_config', _sentinel) is _sentinel:
                 setattr(obj, 'vehicle_tracking_config', None)
         return super().model_validate(obj, **kwargs)
+
+
+# The model_validate overrides above are pure pass-throughs when the vehicle
+# tracking columns exist. In that case, bind Pydantic's compiled validator
+# directly so list endpoints don't pay an extra Python frame per row.
+_camera_schemas = (CameraInDB, CameraOut, CameraRead)
+_deferred_validators = {cls: cls.__dict__["model_validate"] for cls in _camera_schemas}
+
+
+def _install_validators():
+    for cls in _camera_schemas:
+        if _DEFER_VEHICLE_TRACKING:
+            setattr(cls, "model_validate", _deferred_validators[cls])
+        else:
+            setattr(cls, "model_validate", classmethod(BaseModel.model_validate.__func__))
+
+
+_install_validators()
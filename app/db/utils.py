@@ -1,38 +1,55 @@
 """
 Database utility functions for handling optional columns across different app deployments
 """
+import threading
 from sqlalchemy import inspect, text
 from app.database import engine
-from typing import Set
+from typing import Dict, Set, Tuple
 
-# Cache for column existence checks
-_column_cache: dict = {}
+# Memoized column checks, guarded by a lock held across the query itself:
+# concurrent first callers for the same column wait for one
+# information_schema query instead of each firing their own. (lru_cache
+# can't do this - its lock only covers the cache lookup, not the wrapped
+# call.) Failed checks are not cached, so a transient DB hiccup at startup
+# doesn't pin a wrong answer for the process lifetime.
+_column_cache: Dict[Tuple[str, str], bool] = {}
+_column_cache_lock = threading.Lock()
 
 def column_exists(table_name: str, column_name: str) -> bool:
     """
     Check if a column exists in a table.
-    Uses caching to avoid repeated database queries.
+
+    The answer is cached per (table, column); call
+    invalidate_column_cache() after migrations that change the column set.
     """
-    cache_key = f"{table_name}.{column_name}"
-    
-    if cache_key not in _column_cache:
+    key = (table_name, column_name)
+    with _column_cache_lock:
+        cached = _column_cache.get(key)
+        if cached is not None:
+            return cached
         try:
             with engine.connect() as conn:
                 # Check if column exists in the table
                 result = conn.execute(text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = :table_name 
+                    SELECT column_name
+                    FROM information_schema.columns
+                    WHERE table_name = :table_name
                     AND column_name = :column_name
                 """), {"table_name": table_name, "column_name": column_name})
-                
-                _column_cache[cache_key] = result.fetchone() is not None
+
+                exists = result.fetchone() is not None
         except Exception as e:
-            # If we can't check, assume it doesn't exist to be safe
-            print(f"⚠️ Warning: Could not check column existence for {cache_key}: {e}")
-            _column_cache[cache_key] = False
-    
-    return _column_cache[cache_key]
+            # If we can't check, assume it doesn't exist to be safe -
+            # but don't cache the failure
+            print(f"⚠️ Warning: Could not check column existence for {table_name}.{column_name}: {e}")
+            return False
+        _column_cache[key] = exists
+        return exists
+
+def invalidate_column_cache():
+    """Drop all cached column checks (run after schema migrations)"""
+    with _column_cache_lock:
+        _column_cache.clear()
 
 def get_camera_optional_columns() -> Set[str]:
     """
@@ -5,12 +5,60 @@ Geometry utility functions for line crossing detection and other spatial calcula
 from typing import Dict, Optional, Any
 import time
 
+import numpy as np
+
 # Debounce configuration
 MIN_CROSS_INTERVAL = 3.0  # seconds - minimum time between valid crossings for the same track
 
-# In-memory track state for debouncing
-# Structure: {track_id: {"last_cross_time": float, "last_direction": "IN" | "OUT"}}
-track_state: Dict[int, Dict[str, Any]] = {}
+# Direction encoding for the packed state array
+_DIR_IN = 0
+_DIR_OUT = 1
+_DIR_NAMES = ("IN", "OUT")
+
+# In-memory track state for debouncing, stored structure-of-arrays: one
+# preallocated record array plus a track_id -> row map. Compared to a dict
+# of per-track dicts this avoids a heap-allocated dict per first-seen track
+# and keeps state compact (9 bytes/track) for streams with high track churn.
+# Freed rows are recycled through a free-list; the array doubles on demand.
+_TRACK_STATE_DTYPE = np.dtype([("last_cross_time", "f8"), ("last_direction", "u1")])
+_INITIAL_TRACK_CAPACITY = 4096
+
+_track_state_arr = np.zeros(_INITIAL_TRACK_CAPACITY, dtype=_TRACK_STATE_DTYPE)
+_track_rows: Dict[int, int] = {}
+_free_rows: list = []
+_next_row = 0
+
+
+def _allocate_row(track_id: int) -> int:
+    """Assign a state-array row to a new track, growing the array if full"""
+    global _track_state_arr, _next_row
+    if _free_rows:
+        row = _free_rows.pop()
+    else:
+        row = _next_row
+        _next_row += 1
+        if row >= len(_track_state_arr):
+            _track_state_arr = np.concatenate([
+                _track_state_arr,
+                np.zeros(len(_track_state_arr), dtype=_TRACK_STATE_DTYPE)
+            ])
+    _track_rows[track_id] = row
+    return row
+
+
+def line_coefficients(line: Dict[str, float]):
+    """
+    Precompute the implicit-line coefficients (A, B, C) for a line config.
+
+    The side of the line a point (x, y) is on is the sign of A*x + B*y + C,
+    with positive meaning the left side relative to the line direction -
+    the same convention as the cross products below. Compute these once per
+    line-config change so per-point checks are three multiply-adds instead
+    of re-unpacking the line dict every frame.
+    """
+    x1, y1 = line['x1'], line['y1']
+    x2, y2 = line['x2'], line['y2']
+    return (y1 - y2, x2 - x1, x1 * y2 - x2 * y1)
 
 
 def detect_line_crossing(
@@ -67,18 +115,49 @@ def detect_line_crossing(
     if prev_cross * curr_cross >= 0:
         # Same side or on the line - no crossing
         return None
-    
-    # Crossing detected - determine direction
-    # If prev_cross > 0 (left side) and curr_cross < 0 (right side) -> moving OUT
-    # If prev_cross < 0 (right side) and curr_cross > 0 (left side) -> moving IN
-    if prev_cross > 0 and curr_cross < 0:
-        return "OUT"
-    elif prev_cross < 0 and curr_cross > 0:
-        return "IN"
-    
-    # Edge case: one point exactly on the line (cross product = 0)
-    # This shouldn't happen with the >= 0 check above, but handle it anyway
-    return None
+
+    # Opposite signs: prev_cross > 0 (left side) means moving OUT, otherwise
+    # IN - a single branch instead of the old three-way sign re-check
+    return "OUT" if prev_cross > 0 else "IN"
+
+
+def detect_line_crossings_batch(
+    prev_xy: np.ndarray,
+    curr_xy: np.ndarray,
+    line: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized version of detect_line_crossing over a batch of tracks.
+
+    Args:
+        prev_xy: Previous positions, shape (N, 2) as [x, y] rows
+        curr_xy: Current positions, shape (N, 2) as [x, y] rows
+        line: Line definition as array [x1, y1, x2, y2]
+
+    Returns:
+        Object array of shape (N,) holding "IN", "OUT" or None per track,
+        matching what detect_line_crossing returns for each pair.
+
+    Both cross products are computed as single NumPy expressions, so the
+    per-track Python float math of the scalar path collapses into a few
+    C-level array ops - the win grows with the number of tracks per frame.
+    """
+    prev_xy = np.asarray(prev_xy, dtype=np.float64)
+    curr_xy = np.asarray(curr_xy, dtype=np.float64)
+    line = np.asarray(line, dtype=np.float64)
+
+    line_dx = line[2] - line[0]
+    line_dy = line[3] - line[1]
+
+    # Cross product sign tells which side of the line each point is on
+    prev_cross = line_dx * (prev_xy[:, 1] - line[1]) - line_dy * (prev_xy[:, 0] - line[0])
+    curr_cross = line_dx * (curr_xy[:, 1] - line[1]) - line_dy * (curr_xy[:, 0] - line[0])
+
+    crossed = prev_cross * curr_cross < 0
+
+    directions = np.full(prev_cross.shape, None, dtype=object)
+    directions[crossed] = np.where(prev_cross[crossed] > 0, "OUT", "IN")
+    return directions
 
 
 def get_point_side_of_line(point: Dict[str, float], line: Dict[str, float]) -> Optional[str]:
@@ -127,8 +206,13 @@ def should_count_crossing(track_id: int, direction: str, current_time: Optional[
     Args:
         track_id: The unique track ID for the person
         direction: The crossing direction ("IN" or "OUT")
-        current_time: Current timestamp (defaults to time.time() if not provided)
-    
+        current_time: Current timestamp. Callers in a frame loop should pass
+                      the frame's presentation timestamp so no clock is read
+                      on the hot path; all calls must use the same time
+                      source. Defaults to time.monotonic(), which is cheaper
+                      than time.time() and immune to NTP wall-clock jumps
+                      that could falsely reset the debounce window.
+
     Returns:
         True if the crossing should be counted, False if it should be ignored
     
@@ -138,45 +222,92 @@ def should_count_crossing(track_id: int, direction: str, current_time: Optional[
         - Otherwise: count and update state
     """
     if current_time is None:
-        current_time = time.time()
-    
+        current_time = time.monotonic()
+
     # Normalize direction to uppercase
     direction = direction.upper()
     if direction not in ("IN", "OUT"):
         return False
-    
-    # Get or initialize track state
-    if track_id not in track_state:
+    dir_code = _DIR_OUT if direction == "OUT" else _DIR_IN
+
+    row = _track_rows.get(track_id)
+    if row is None:
         # First crossing for this track - always count
-        track_state[track_id] = {
-            "last_cross_time": current_time,
-            "last_direction": direction
-        }
+        row = _allocate_row(track_id)
+        _track_state_arr[row] = (current_time, dir_code)
         return True
-    
-    state = track_state[track_id]
-    last_cross_time = state.get("last_cross_time", 0.0)
-    last_direction = state.get("last_direction")
-    
+
     # Check time interval
-    time_since_last = current_time - last_cross_time
+    time_since_last = current_time - _track_state_arr["last_cross_time"][row]
     if time_since_last < MIN_CROSS_INTERVAL:
         # Too soon after last crossing - ignore
         return False
-    
+
     # Check if same direction as last crossing
-    if direction == last_direction:
+    if dir_code == _track_state_arr["last_direction"][row]:
         # Same direction as last - ignore (likely hesitation or back-and-forth)
         return False
-    
+
     # Valid crossing - update state and count
-    track_state[track_id] = {
-        "last_cross_time": current_time,
-        "last_direction": direction
-    }
+    _track_state_arr[row] = (current_time, dir_code)
     return True
 
 
+def should_count_crossings_batch(track_ids, directions, times) -> np.ndarray:
+    """
+    Vectorized version of should_count_crossing for a batch of crossings.
+
+    Args:
+        track_ids: Sequence of track IDs (one per detected crossing)
+        directions: Sequence of crossing directions ("IN" or "OUT")
+        times: Sequence of crossing timestamps (same time source for all)
+
+    Returns:
+        Boolean array: True where the crossing should be counted.
+
+    State rows are gathered in one pass, the interval/direction checks run
+    as branchless array ops, and accepted rows are scattered back in one
+    shot - the per-track Python branching of the scalar path collapses to
+    a single C loop over the batch.
+    """
+    n = len(track_ids)
+    rows = np.empty(n, dtype=np.int64)
+    dir_codes = np.zeros(n, dtype=np.uint8)
+    new_mask = np.zeros(n, dtype=bool)
+    valid = np.ones(n, dtype=bool)
+
+    # Gather state rows, allocating for first-seen tracks
+    for i, (track_id, direction) in enumerate(zip(track_ids, directions)):
+        direction = direction.upper()
+        if direction not in ("IN", "OUT"):
+            valid[i] = False
+            rows[i] = 0
+            continue
+        dir_codes[i] = _DIR_OUT if direction == "OUT" else _DIR_IN
+        row = _track_rows.get(track_id)
+        if row is None:
+            row = _allocate_row(track_id)
+            new_mask[i] = True
+        rows[i] = row
+
+    times = np.asarray(times, dtype=np.float64)
+    last_times = _track_state_arr["last_cross_time"][rows]
+    last_dirs = _track_state_arr["last_direction"][rows]
+
+    # First crossing always counts; otherwise require the debounce interval
+    # to have elapsed and the direction to differ from the last crossing
+    accepted = valid & (
+        new_mask
+        | (((times - last_times) >= MIN_CROSS_INTERVAL) & (dir_codes != last_dirs))
+    )
+
+    # Scatter state updates for accepted crossings in one shot
+    accepted_rows = rows[accepted]
+    _track_state_arr["last_cross_time"][accepted_rows] = times[accepted]
+    _track_state_arr["last_direction"][accepted_rows] = dir_codes[accepted]
+    return accepted
+
+
 def reset_track_state(track_id: int):
     """
     Reset the debounce state for a specific track.
@@ -186,28 +317,38 @@ def reset_track_state(track_id: int):
     Args:
         track_id: The track ID to reset
     """
-    if track_id in track_state:
-        del track_state[track_id]
+    row = _track_rows.pop(track_id, None)
+    if row is not None:
+        _free_rows.append(row)
 
 
 def clear_all_track_states():
     """
     Clear all track debounce states.
-    
+
     Useful for cleanup or when resetting the system.
     """
-    track_state.clear()
+    global _next_row
+    _track_rows.clear()
+    _free_rows.clear()
+    _next_row = 0
 
 
 def get_track_state(track_id: int) -> Optional[Dict[str, Any]]:
     """
     Get the current debounce state for a track.
-    
+
     Args:
         track_id: The track ID to query
-    
+
     Returns:
         Dictionary with "last_cross_time" and "last_direction", or None if track not found
     """
-    return track_state.get(track_id)
+    row = _track_rows.get(track_id)
+    if row is None:
+        return None
+    return {
+        "last_cross_time": float(_track_state_arr["last_cross_time"][row]),
+        "last_direction": _DIR_NAMES[_track_state_arr["last_direction"][row]]
+    }
 
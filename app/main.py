@@ -32,7 +32,13 @@ if os.getenv("ENV", "production") != "production":
             print("✅ Vehicle tracking columns already exist, skipping migration")
         else:
             print(f"⚠️ Migration warning: {str(e)}")
-    
+
+    # The camera schemas resolved their vehicle-tracking defer flag when the
+    # route imports above pulled them in - before the migration ran - so
+    # re-resolve it now that the column set is final
+    from app.db.schemas.camera import refresh_defer_flag
+    refresh_defer_flag()
+
     # Run migration for person detection
     try:
         from app.db.migrations.add_person_detection import upgrade as upgrade_person_detection
@@ -57,6 +63,18 @@ if os.getenv("ENV", "production") != "production":
         else:
             print(f"⚠️ AI inference settings migration warning: {str(e)}")
     
+    # Run migration for entry/exit event indexes
+    try:
+        from app.db.migrations.add_entry_exit_event_indexes import upgrade as upgrade_entry_exit_indexes
+        upgrade_entry_exit_indexes()
+    except Exception as e:
+        # Check if error is because index already exists (which is fine)
+        error_str = str(e).lower()
+        if "already exists" in error_str:
+            print("✅ Entry/exit event indexes already exist, skipping migration")
+        else:
+            print(f"⚠️ Entry/exit event index migration warning: {str(e)}")
+
     # Seed the database with initial data
     from app.init_db import seed
     seed()
@@ -210,7 +228,10 @@ def health():
 async def startup_event():
     """Initialize cameras and services on application startup"""
     print("🚀 BACKEND STARTUP: Starting application initialization...")
-    
+
+    # Let the entrance/exit module schedule polling tasks onto this loop
+    entrance_exit.capture_event_loop()
+
     try:
         # Get database session
         db = next(get_db())
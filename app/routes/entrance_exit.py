@@ -3,7 +3,7 @@ Entrance/Exit Analytics Routes
 
 API endpoints for configuring and querying entrance/exit analytics.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
@@ -13,11 +13,19 @@ from app.db.crud import entry_exit_event as event_crud
 from app.db.schemas.entry_exit_event import EntryExitEvent
 from app.db.schemas.analytics import AnalyticsUpdate
 from app.constants.analytics import AnalyticsType
-import threading
+import asyncio
+import logging
 import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 import os
-from app.services.entrance_exit_engine import process_person_centroid, clear_track_position
+from app.services.entrance_exit_engine import (
+    process_person_centroids_batch,
+    flush_event_buffer,
+)
+from app.geometry_utils import line_coefficients
 from app.db.crud import camera as camera_crud
 
 router = APIRouter(
@@ -25,144 +33,457 @@ router = APIRouter(
     tags=["entrance-exit"]
 )
 
+
+class _RateLimitFilter(logging.Filter):
+    """
+    Emit at most one DEBUG record per interval for each (message, args) key.
+
+    The polling loop logs a per-camera DEBUG line every batch; under Docker
+    every record is a write(2) through the json-file log driver, so
+    repeated identical records are pure overhead. Only DEBUG is limited -
+    event records, warnings and exceptions must never be suppressed - and
+    the key covers the full args tuple so two records that differ in any
+    argument are both emitted.
+    """
+    def __init__(self, interval: float = 1.0):
+        super().__init__()
+        self._interval = interval
+        self._last = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.msg, record.args)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self._interval:
+            return False
+        self._last[key] = now
+        return True
+
+
+# Polling-path logger: %s-lazy formatting plus the rate limiter above, so
+# quiet log levels pay neither string formatting nor a syscall per batch
+logger = logging.getLogger(__name__)
+logger.addFilter(_RateLimitFilter())
+
 AI_INFERENCE_URL = os.getenv("AI_INFERENCE_URL", "http://ai_inference:8001")
 
-# Thread manager: {camera_id: thread}
-entrance_polling_threads = {}
-# Thread control: {camera_id: should_stop}
-thread_control = {}
+# Advertise compressed transfer for the detection payloads - the poll is
+# network-bound at scale, so fewer bytes on the wire means less recv and
+# parse time. zstd is only offered when the decoder is installed.
+try:
+    import zstandard  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, zstd"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip"
+
+# Shared async HTTP client - keep-alive connections are reused across all
+# polling iterations instead of one blocking requests.get per camera/second
+_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=64),
+    # 2s is plenty for a sidecar on the same host; a longer timeout just
+    # delays shutdown and error recovery when the inference service is dead
+    timeout=2.0,
+    headers={"Accept-Encoding": _ACCEPT_ENCODING}
+)
+
+# Shared session for the synchronous inference-control calls made from
+# request handlers - pooled keep-alive connections avoid a fresh TCP
+# handshake to the inference service on every config update
+_http = requests.Session()
+_http.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=0))
+
+# Server event loop, captured at startup so sync request handlers (which run
+# in the threadpool) can schedule polling coroutines onto it
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Cameras currently polled, with their entrance config resolved once at
+# start (line, direction filter, entrance side) so the coordinator doesn't
+# re-read the DB every iteration: {camera_id: poll config dict}
+active_cameras = {}
+
+# The single coordinator task that polls all active cameras
+_coordinator_task = None
+
+# Whether the batched detections endpoint exists on the inference service;
+# cleared on the first 404 so we fall back to per-camera fetches
+_batch_endpoint_available = True
+
+# Whether the push detections stream exists on the inference service;
+# cleared on the first 404 so we fall back to 1 Hz polling
+_stream_endpoint_available = True
+
+# Process-local TTL cache of each camera's resolved ENTRANCE analytics row:
+# {camera_id: (monotonic timestamp, analytics-or-None)}. Status and config
+# endpoints are polled at ~1 Hz by the frontend; a short TTL absorbs those
+# repeated SELECT + scan round-trips. Invalidated on any config change.
+_entrance_config_cache = {}
+_ENTRANCE_CACHE_TTL = 5.0
+
+
+def _get_entrance_analytics_cached(db: Session, camera_id: int, ttl: float = _ENTRANCE_CACHE_TTL):
+    """Return the camera's ENTRANCE analytics row, cached for a few seconds"""
+    cached = _entrance_config_cache.get(camera_id)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    entrance_analytics = analytics_crud.get_camera_analytic_by_type(
+        db, camera_id, AnalyticsType.ENTRANCE
+    )
+
+    _entrance_config_cache[camera_id] = (time.monotonic(), entrance_analytics)
+    return entrance_analytics
+
+
+def _invalidate_entrance_cache(camera_id: int):
+    _entrance_config_cache.pop(camera_id, None)
+
+
+# Short-lived cache of continuous-inference status per camera:
+# {camera_id: (monotonic timestamp, running)}. Config updates tend to come
+# in bursts from the UI; the cache keeps each burst to one status RPC per
+# camera instead of one per request.
+_inference_status_cache = {}
+_INFERENCE_STATUS_TTL = 2.0
+
+
+def _inference_running(camera_id: int) -> bool:
+    """Whether continuous inference is running for a camera (cached ~2s)"""
+    cached = _inference_status_cache.get(camera_id)
+    if cached is not None and time.monotonic() - cached[0] < _INFERENCE_STATUS_TTL:
+        return cached[1]
+
+    running = False
+    try:
+        resp = _http.get(
+            f"{AI_INFERENCE_URL}/inference/continuous/status",
+            params={"camera_id": str(camera_id)},
+            timeout=2.0
+        )
+        running = resp.ok and resp.json().get("running", False)
+    except Exception as e:
+        print(f"⚠️ Could not check AI inference status for camera {camera_id}: {e}")
+    _inference_status_cache[camera_id] = (time.monotonic(), running)
+    return running
+
+
+def capture_event_loop():
+    """Record the running event loop; called from the FastAPI startup hook"""
+    global _event_loop
+    _event_loop = asyncio.get_running_loop()
 
 
 def stop_entrance_polling(camera_id: int):
-    """Stop the background polling thread for a camera"""
-    if camera_id in entrance_polling_threads:
+    """Stop entrance/exit polling for a camera"""
+    global _coordinator_task
+    _invalidate_entrance_cache(camera_id)
+    if active_cameras.pop(camera_id, None) is not None:
         print(f"⏸️ Stopping entrance/exit polling for camera {camera_id}")
-        thread_control[camera_id] = True
-        del entrance_polling_threads[camera_id]
-    elif camera_id in thread_control:
-        # Clean up thread control even if thread doesn't exist
-        thread_control[camera_id] = True
+
+    if _coordinator_task is None or _coordinator_task.done():
+        return
+
+    # Cancellation interrupts a mid-await sleep or stream read right away -
+    # the asyncio analogue of signalling a threading.Event - so stops take
+    # effect immediately instead of after the current poll/read completes
+    _coordinator_task.cancel()
+    _coordinator_task = None
+
+    if active_cameras and _event_loop is not None:
+        # Other cameras still active - restart so a live stream
+        # re-subscribes without the stopped camera
+        from app.database import SessionLocal
+        _coordinator_task = asyncio.run_coroutine_threadsafe(
+            _coordinator_loop(SessionLocal), _event_loop
+        )
+
+
+def _resolve_poll_config(session: Session, camera_id: int):
+    """Resolve the entrance analytics config a camera needs for polling, or None"""
+    entrance_analytics = _get_entrance_analytics_cached(session, camera_id)
+    if entrance_analytics is not None and not entrance_analytics.is_active:
+        entrance_analytics = None
+
+    if not entrance_analytics:
+        print(f"No active entrance analytics found for camera {camera_id}")
+        return None
+
+    config = entrance_analytics.config or {}
+    if not config.get("enabled", False):
+        print(f"Entrance analytics not enabled for camera {camera_id}")
+        return None
+
+    line_config = config.get("line", {})
+    if not line_config or not all(k in line_config for k in ["x1", "y1", "x2", "y2"]):
+        print(f"Invalid line configuration for camera {camera_id}")
+        return None
+
+    # Precompute the implicit-line coefficients and the entrance-side sign
+    # once per config change - the 1 Hz hot path then never rederives them
+    coeffs = line_coefficients(line_config)
+    entrance_side_point = config.get("entrance_side")  # Optional: {'x': float, 'y': float}
+    entrance_sign = 0.0
+    if entrance_side_point:
+        A, B, C = coeffs
+        entrance_sign = A * entrance_side_point['x'] + B * entrance_side_point['y'] + C
+
+    return {
+        "line_config": line_config,
+        "direction_filter": config.get("direction", "both"),
+        "entrance_side_point": entrance_side_point,
+        "coeffs": coeffs,
+        "entrance_sign": entrance_sign
+    }
 
 
 def start_entrance_polling(camera_id: int, db_session_factory):
-    """Start a background thread to poll AI inference for person detections and process entrance/exit events"""
-    def polling_loop():
-        session = db_session_factory()
+    """Register a camera for entrance/exit polling and ensure the coordinator task is running"""
+    global _coordinator_task
+    if camera_id in active_cameras:
+        print(f"Entrance/exit polling already running for camera {camera_id}")
+        return
+
+    if _event_loop is None:
+        print(f"❌ Cannot start entrance/exit polling for camera {camera_id}: event loop not captured yet")
+        return
+
+    _invalidate_entrance_cache(camera_id)
+    session = db_session_factory()
+    try:
+        poll_config = _resolve_poll_config(session, camera_id)
+    finally:
+        session.close()
+    if poll_config is None:
+        return
+
+    active_cameras[camera_id] = poll_config
+    print(f"🚀 Starting entrance/exit polling for camera {camera_id} with line: {poll_config['line_config']}")
+
+    if _coordinator_task is not None and not _coordinator_task.done():
+        # Restart the coordinator so a live detection stream re-subscribes
+        # with the new camera id (buffered events are flushed on cancel)
+        _coordinator_task.cancel()
+
+    # One coordinator coroutine serves every camera: a single stream
+    # subscription (or HTTP round-trip per second) regardless of camera count
+    _coordinator_task = asyncio.run_coroutine_threadsafe(
+        _coordinator_loop(db_session_factory), _event_loop
+    )
+
+
+async def _fetch_all_detections(camera_ids):
+    """
+    Fetch the latest person detections for all cameras, preferring the
+    batched endpoint; falls back to per-camera requests if the inference
+    service doesn't provide it. Returns {camera_id: [detections]}.
+    """
+    global _batch_endpoint_available
+    if _batch_endpoint_available:
+        resp = await _client.get(
+            f"{AI_INFERENCE_URL}/shared/cameras/detections/latest",
+            params={
+                "camera_ids": ",".join(map(str, camera_ids)),
+                "object_filter": "person",
+                # Project away fields the engine never reads (confidence,
+                # class_name, ...) - smaller payload, faster JSON decode
+                "fields": "track_id,bbox,timestamp"
+            }
+        )
+        if resp.status_code == 404:
+            _batch_endpoint_available = False
+            logger.warning("Batched detections endpoint not available, falling back to per-camera polling")
+        elif resp.is_success:
+            # orjson decodes a few times faster than the stdlib parser -
+            # this runs once per poll for the whole camera fleet
+            result = orjson.loads(resp.content)
+            return {
+                int(cid): payload.get("detections", [])
+                for cid, payload in result.get("cameras", {}).items()
+            }
+        else:
+            return {}
+
+    detections_by_camera = {}
+    for cid in camera_ids:
+        resp = await _client.get(
+            f"{AI_INFERENCE_URL}/shared/cameras/{cid}/detections/latest",
+            params={"object_filter": "person", "fields": "track_id,bbox,timestamp"}
+        )
+        if resp.is_success:
+            detections_by_camera[cid] = orjson.loads(resp.content).get("detections", [])
+    return detections_by_camera
+
+
+def _process_detections(session: Session, camera_id: int, detections):
+    """Run entrance/exit crossing detection over one camera's detections"""
+    poll_config = active_cameras.get(camera_id)
+    if poll_config is None:
+        return
+
+    if len(detections) > 0:
+        logger.debug("Camera %s: received %s person detections", camera_id, len(detections))
+
+    # Centroids and crossing checks for the whole batch run as NumPy array
+    # ops in the engine instead of per-detection Python float math
+    events = process_person_centroids_batch(
+        session,
+        camera_id,
+        detections,
+        poll_config["line_config"],
+        poll_config["direction_filter"],
+        poll_config["entrance_side_point"],
+        coeffs=poll_config["coeffs"],
+        entrance_sign=poll_config["entrance_sign"]
+    )
+    for event in events:
+        logger.info("Camera %s: processed %s event for track %s",
+                    camera_id, event['event'], event['track_id'])
+
+
+def _process_and_flush(db_session_factory, detections_by_camera):
+    """
+    Synchronous half of one coordinator step: run crossing detection over
+    each camera's detections and flush the event buffer, all inside one
+    short-lived session. The coordinator calls this via asyncio.to_thread -
+    the flush commits over psycopg2, and under a slow or exhausted pool
+    (pool_timeout is 30s) a direct call would block the server's event
+    loop, freezing every request uvicorn serves.
+    """
+    with db_session_factory() as session:
+        for cid, detections in detections_by_camera.items():
+            _process_detections(session, cid, detections)
+        flush_event_buffer(session)
+
+
+def _flush_events(db_session_factory, force: bool = False):
+    """Flush buffered events in their own session (also run via to_thread)"""
+    with db_session_factory() as session:
+        flush_event_buffer(session, force=force)
+
+
+async def _periodic_flush(db_session_factory):
+    """
+    Age out buffered events while the detection stream is quiet. In stream
+    mode flush_event_buffer otherwise only runs when a payload arrives, so
+    once the scene goes still a partially filled buffer would sit
+    unpersisted indefinitely - the age threshold never fires without a
+    caller. The 1s cadence matches the engine's flush age.
+    """
+    while True:
+        await asyncio.sleep(1)
+        await asyncio.to_thread(_flush_events, db_session_factory)
+
+
+async def _consume_detection_stream(db_session_factory):
+    """
+    Subscribe to the inference service's detections stream and process
+    payloads as they arrive - no idle wakeups and no one-second latency
+    floor on events. Returns when the endpoint turns out not to exist
+    (clearing _stream_endpoint_available) or when the active camera set
+    has changed, so the coordinator re-subscribes with the new id list.
+    """
+    global _stream_endpoint_available
+    subscribed = set(active_cameras)
+    async with _client.stream(
+        "GET",
+        f"{AI_INFERENCE_URL}/shared/detections/stream",
+        params={
+            "camera_ids": ",".join(map(str, sorted(subscribed))),
+            "object_filter": "person",
+            "fields": "track_id,bbox,timestamp"
+        },
+        # An idle stream is normal - keep the connect deadline but no read one
+        timeout=httpx.Timeout(2.0, read=None)
+    ) as resp:
+        if resp.status_code == 404:
+            _stream_endpoint_available = False
+            logger.warning("Detections stream endpoint not available, falling back to polling")
+            return
+        resp.raise_for_status()
+        flusher = asyncio.create_task(_periodic_flush(db_session_factory))
         try:
-            # Get entrance analytics config for this camera
-            camera_analytics = analytics_crud.get_camera_analytics(session, camera_id)
-            entrance_analytics = None
-            for analytics in camera_analytics:
-                if analytics.type == AnalyticsType.ENTRANCE and analytics.is_active:
-                    entrance_analytics = analytics
-                    break
-            
-            if not entrance_analytics:
-                print(f"No active entrance analytics found for camera {camera_id}")
-                return
-            
-            config = entrance_analytics.config or {}
-            if not config.get("enabled", False):
-                print(f"Entrance analytics not enabled for camera {camera_id}")
-                return
-            
-            line_config = config.get("line", {})
-            if not line_config or not all(k in line_config for k in ["x1", "y1", "x2", "y2"]):
-                print(f"Invalid line configuration for camera {camera_id}")
-                return
-            
-            direction_filter = config.get("direction", "both")
-            entrance_side_point = config.get("entrance_side")  # Optional: {'x': float, 'y': float}
-            
-            print(f"🚀 Starting entrance/exit polling for camera {camera_id} with line: {line_config}")
-            
-            # Poll for person detections
-            while camera_id not in thread_control or not thread_control[camera_id]:
-                try:
-                    # Get tracked person detections from AI inference service
-                    resp = requests.get(
-                        f"{AI_INFERENCE_URL}/shared/cameras/{camera_id}/detections/latest",
-                        params={"object_filter": "person"},
-                        timeout=5.0
+            async for line in resp.aiter_lines():
+                if not line or line.startswith(":"):
+                    continue  # SSE keep-alive / comment
+                if line.startswith("data:"):
+                    line = line[5:].strip()
+                payload = orjson.loads(line)
+                cid = payload.get("camera_id")
+                if cid is not None and int(cid) in active_cameras:
+                    # Session per payload: closed (and its connection
+                    # returned to the pool) as soon as the events are
+                    # flushed, instead of pinning one session for the
+                    # stream's lifetime. Runs in a worker thread so the
+                    # commit never blocks the loop.
+                    await asyncio.to_thread(
+                        _process_and_flush, db_session_factory,
+                        {int(cid): payload.get("detections", [])}
                     )
-                    
-                    if resp.ok:
-                        result = resp.json()
-                        detections = result.get("detections", [])
-                        
-                        if len(detections) > 0:
-                            print(f"📊 Received {len(detections)} person detections for camera {camera_id}")
-                        
-                        # Process each detection
-                        for det in detections:
-                            track_id = det.get("track_id")
-                            bbox = det.get("bbox", [])
-                            
-                            if track_id is None or len(bbox) != 4:
-                                continue
-                            
-                            # Calculate centroid from bbox [x1, y1, x2, y2]
-                            x1, y1, x2, y2 = bbox
-                            centroid_x = (x1 + x2) / 2.0
-                            centroid_y = (y1 + y2) / 2.0
-                            
-                            # Get timestamp
-                            timestamp = det.get("timestamp")
-                            if timestamp is None:
-                                timestamp = time.time()
-                            
-                            # Process centroid event
-                            event = process_person_centroid(
-                                session,
-                                camera_id,
-                                track_id,
-                                centroid_x,
-                                centroid_y,
-                                line_config,
-                                direction_filter,
-                                timestamp,
-                                entrance_side_point
-                            )
-                            if event:
-                                print(f"✅ Processed {event['event']} event for track {track_id} on camera {camera_id}")
-                    
-                    time.sleep(1)  # Poll every second
-                    
-                except requests.exceptions.RequestException as e:
-                    print(f"⚠️ Network error fetching detections for camera {camera_id}: {e}")
-                    time.sleep(1)
-                except Exception as e:
-                    print(f"❌ Error in entrance/exit polling for camera {camera_id}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    time.sleep(1)
-            
-            print(f"⏸️ Entrance/exit polling stopped for camera {camera_id}")
+                if set(active_cameras) != subscribed:
+                    # Camera set changed - re-subscribe with the new ids
+                    return
         finally:
-            session.close()
-            if camera_id in thread_control:
-                del thread_control[camera_id]
-    
-    if camera_id in entrance_polling_threads:
-        print(f"Entrance/exit polling already running for camera {camera_id}")
-        return
-    
-    thread_control[camera_id] = False
-    thread = threading.Thread(target=polling_loop, daemon=True)
-    entrance_polling_threads[camera_id] = thread
-    thread.start()
+            flusher.cancel()
+
+
+async def _coordinator_loop(db_session_factory):
+    """
+    Consume person detections for every active camera - via the push
+    stream when the inference service provides one, otherwise by polling
+    once per second.
+
+    Sessions are opened per iteration (or per stream payload) rather than
+    once for the coordinator's lifetime: a long-lived session accumulates
+    identity-map state forever and pins its pool connection; a short one
+    is closed as soon as the events are flushed. Opening a Session is
+    cheap - no connection is checked out until the flush actually writes.
+    """
+    try:
+        while True:
+            try:
+                if not active_cameras:
+                    await asyncio.sleep(1)
+                    continue
+
+                if _stream_endpoint_available:
+                    await _consume_detection_stream(db_session_factory)
+                    continue
+
+                detections_by_camera = await _fetch_all_detections(list(active_cameras))
+                # Crossing detection plus one bulk INSERT per iteration
+                # (instead of an INSERT+commit per crossing), off-loop so
+                # the sync DB work can't stall the server
+                await asyncio.to_thread(
+                    _process_and_flush, db_session_factory, detections_by_camera
+                )
+
+                await asyncio.sleep(1)  # Poll every second
+
+            except httpx.HTTPError as e:
+                logger.warning("Network error fetching detections: %s", e)
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error in entrance/exit polling")
+                await asyncio.sleep(1)
+
+    except asyncio.CancelledError:
+        logger.info("Entrance/exit polling coordinator stopped")
+    finally:
+        try:
+            # Don't lose events buffered since the last flush
+            await asyncio.to_thread(_flush_events, db_session_factory, True)
+        except Exception as e:
+            logger.warning("Could not flush buffered entrance/exit events on shutdown: %s", e)
 
 
 @router.get("/config/{camera_id}")
 def get_entrance_config(camera_id: int, db: Session = Depends(get_db)):
     """Get entrance/exit configuration for a camera"""
-    camera_analytics = analytics_crud.get_camera_analytics(db, camera_id)
-    entrance_analytics = None
-    for analytics in camera_analytics:
-        if analytics.type == AnalyticsType.ENTRANCE:
-            entrance_analytics = analytics
-            break
-    
+    entrance_analytics = _get_entrance_analytics_cached(db, camera_id)
+
     if not entrance_analytics:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -179,9 +500,58 @@ def get_entrance_config(camera_id: int, db: Session = Depends(get_db)):
     }
 
 
+def _ensure_inference_and_start(camera_id: int):
+    """
+    Deferred half of update_entrance_config: make sure continuous AI
+    inference is running for the camera, then register it for entrance/
+    exit polling. Runs as a background task after the response is sent -
+    the sidecar RPCs no longer sit on the request path - using its own
+    session and the pooled _http client.
+    """
+    from app.database import SessionLocal
+    try:
+        if not _inference_running(camera_id):
+            # Get FPS from settings
+            from app.db.models.settings import Settings
+            inference_fps = 5.0  # Default
+            session = SessionLocal()
+            try:
+                settings = session.query(Settings).first()
+                if settings and hasattr(settings, 'ai_inference_fps'):
+                    inference_fps = settings.ai_inference_fps
+            finally:
+                session.close()
+
+            # Start inference with person tracking
+            inference_start = _http.post(
+                f"{AI_INFERENCE_URL}/inference/continuous/start",
+                params={
+                    "camera_id": str(camera_id),
+                    "model_name": "yolov8n",
+                    "accelerator": "cpu32",
+                    "object_filter": "person",
+                    "inference_fps": inference_fps
+                },
+                timeout=5.0
+            )
+            if inference_start.ok:
+                # Mark running optimistically so a burst of config
+                # updates doesn't trigger repeated start calls
+                _inference_status_cache[camera_id] = (time.monotonic(), True)
+                print(f"✅ Started AI inference with person tracking for camera {camera_id}")
+            else:
+                print(f"⚠️ Failed to start AI inference for camera {camera_id}: {inference_start.status_code}")
+    except Exception as e:
+        print(f"⚠️ Could not verify/start AI inference for camera {camera_id}: {e}")
+
+    start_entrance_polling(camera_id, SessionLocal)
+    print(f"✅ Started entrance/exit polling for camera {camera_id}")
+
+
 @router.put("/config/{camera_id}")
 def update_entrance_config(
     camera_id: int,
+    background_tasks: BackgroundTasks,
     enabled: Optional[bool] = None,
     line: Optional[dict] = None,
     direction: Optional[str] = None,
@@ -197,14 +567,12 @@ def update_entrance_config(
             detail="Camera not found"
         )
     
-    # Get or create entrance analytics
-    camera_analytics = analytics_crud.get_camera_analytics(db, camera_id)
-    entrance_analytics = None
-    for analytics in camera_analytics:
-        if analytics.type == AnalyticsType.ENTRANCE:
-            entrance_analytics = analytics
-            break
-    
+    # Get or create entrance analytics (bypass the TTL cache on the write path)
+    _invalidate_entrance_cache(camera_id)
+    entrance_analytics = analytics_crud.get_camera_analytic_by_type(
+        db, camera_id, AnalyticsType.ENTRANCE
+    )
+
     if not entrance_analytics:
         # Create new entrance analytics
         from app.db.schemas.analytics import AnalyticsCreate
@@ -294,41 +662,18 @@ def update_entrance_config(
             config["enabled"] = True if line is not None else False
         
         print(f"🔧 Updating entrance analytics for camera {camera_id} with cleaned config: {config}")
-        print(f"🔍 Config keys: {list(config.keys())}, enabled value: {config.get('enabled')}")
-        
-        # Create update with config explicitly set
-        update = AnalyticsUpdate(config=config)
-        print(f"🔍 Creating AnalyticsUpdate with config: {config}")
-        update_data = update.model_dump(exclude_unset=False)  # Don't exclude unset, include everything
-        print(f"🔍 Update data being sent: {update_data}")
-        
-        updated_analytics = analytics_crud.update_analytics(db, entrance_analytics.id, update)
-        
-        # Force refresh to get latest data from database
-        db.refresh(updated_analytics)
-        entrance_analytics = updated_analytics
-        
-        # Verify the config was saved correctly by querying directly from DB
-        final_config = entrance_analytics.config or {}
-        print(f"✅ After update, config is: {final_config}, enabled={final_config.get('enabled')}")
-        print(f"🔍 Final config keys: {list(final_config.keys()) if final_config else 'empty'}")
-        
-        # Double-check by re-querying from database
-        db.expire_all()  # Expire all cached objects to force fresh query
-        fresh_analytics = analytics_crud.get_analytics(db, entrance_analytics.id)
-        if fresh_analytics:
-            fresh_config = fresh_analytics.config or {}
-            print(f"🔍 Fresh query from DB: config={fresh_config}, enabled={fresh_config.get('enabled')}")
-            entrance_analytics = fresh_analytics
-            final_config = fresh_config
-    
-    # Refresh to get latest config from database
-    db.refresh(entrance_analytics)
-    
+
+        # update_analytics commits and returns the row already synced with
+        # the database (UPDATE .. RETURNING), so no refresh or re-query is
+        # needed - and no expire_all, which would invalidate every cached
+        # object in this session
+        entrance_analytics = analytics_crud.update_analytics(
+            db, entrance_analytics.id, AnalyticsUpdate(config=config)
+        )
+
     # Start/stop polling based on enabled status
     final_config = entrance_analytics.config or {}
-    print(f"🔍 Entrance config check for camera {camera_id}: enabled={final_config.get('enabled', False)}, is_active={entrance_analytics.is_active}, config={final_config}")
-    
+
     if final_config.get("enabled", False) and entrance_analytics.is_active:
         # Ensure person detection is enabled for the camera
         if not camera.person_detection_enabled:
@@ -336,45 +681,11 @@ def update_entrance_config(
             camera_update = CameraUpdate(person_detection_enabled=True)
             camera_crud.update_camera(db, camera_id, camera_update)
             print(f"✅ Enabled person detection for camera {camera_id} (required for entrance/exit analytics)")
-        
-        # Ensure AI inference is running with person tracking
-        # The entrance polling will request detections with object_filter="person" which enables tracking
-        try:
-            inference_check = requests.get(
-                f"{AI_INFERENCE_URL}/inference/continuous/status",
-                params={"camera_id": str(camera_id)},
-                timeout=2.0
-            )
-            if not (inference_check.ok and inference_check.json().get("running", False)):
-                # Get FPS from settings
-                from app.db.models.settings import Settings
-                settings = db.query(Settings).first()
-                inference_fps = 5.0  # Default
-                if settings and hasattr(settings, 'ai_inference_fps'):
-                    inference_fps = settings.ai_inference_fps
-                
-                # Start inference with person tracking
-                inference_start = requests.post(
-                    f"{AI_INFERENCE_URL}/inference/continuous/start",
-                    params={
-                        "camera_id": str(camera_id),
-                        "model_name": "yolov8n",
-                        "accelerator": "cpu32",
-                        "object_filter": "person",
-                        "inference_fps": inference_fps
-                    },
-                    timeout=5.0
-                )
-                if inference_start.ok:
-                    print(f"✅ Started AI inference with person tracking for camera {camera_id}")
-                else:
-                    print(f"⚠️ Failed to start AI inference for camera {camera_id}: {inference_start.status_code}")
-        except Exception as e:
-            print(f"⚠️ Could not verify/start AI inference for camera {camera_id}: {e}")
-        
-        from app.database import SessionLocal
-        start_entrance_polling(camera_id, SessionLocal)
-        print(f"✅ Started entrance/exit polling for camera {camera_id}")
+
+        # Inference start and polling registration involve sidecar RPCs
+        # with multi-second timeouts - run them after the response is sent
+        # instead of blocking the client on them
+        background_tasks.add_task(_ensure_inference_and_start, camera_id)
     else:
         print(f"⚠️ Not starting polling: enabled={final_config.get('enabled', False)}, is_active={entrance_analytics.is_active}")
         stop_entrance_polling(camera_id)
@@ -421,13 +732,8 @@ def start_entrance_tracking(camera_id: int, db: Session = Depends(get_db)):
         )
     
     # Get entrance analytics
-    camera_analytics = analytics_crud.get_camera_analytics(db, camera_id)
-    entrance_analytics = None
-    for analytics in camera_analytics:
-        if analytics.type == AnalyticsType.ENTRANCE:
-            entrance_analytics = analytics
-            break
-    
+    entrance_analytics = _get_entrance_analytics_cached(db, camera_id)
+
     if not entrance_analytics:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -456,18 +762,12 @@ def stop_entrance_tracking(camera_id: int):
 @router.get("/camera/{camera_id}/status")
 def get_entrance_tracking_status(camera_id: int, db: Session = Depends(get_db)):
     """Get the status of entrance/exit tracking for a camera"""
-    is_running = camera_id in entrance_polling_threads
-    thread = entrance_polling_threads.get(camera_id)
-    is_alive = thread.is_alive() if thread else False
+    is_running = camera_id in active_cameras
+    is_alive = is_running and _coordinator_task is not None and not _coordinator_task.done()
     
     # Get analytics config
-    camera_analytics = analytics_crud.get_camera_analytics(db, camera_id)
-    entrance_analytics = None
-    for analytics in camera_analytics:
-        if analytics.type == AnalyticsType.ENTRANCE:
-            entrance_analytics = analytics
-            break
-    
+    entrance_analytics = _get_entrance_analytics_cached(db, camera_id)
+
     config = entrance_analytics.config if entrance_analytics else {}
     
     return {
@@ -504,25 +804,16 @@ def get_entrance_exit_counts(
                 detail="Invalid date format. Use YYYY-MM-DD"
             )
     
-    # Get counts from database
+    # Get counts from database - camera name/location come back joined in
+    # the same query, so no per-row camera lookup is needed here
     counts = event_crud.get_entry_exit_counts_by_camera(
         db=db,
         target_date=parsed_date,
         camera_id=camera_id
     )
-    
-    # Enrich with camera names
-    result = []
-    for count_data in counts:
-        camera = camera_crud.get_camera(db, count_data['camera_id'])
-        result.append({
-            **count_data,
-            'camera_name': camera.name if camera else f"Camera {count_data['camera_id']}",
-            'camera_location': camera.location if camera else None
-        })
-    
+
     return {
         "date": (parsed_date or datetime.utcnow().date()).isoformat(),
-        "counts": result
+        "counts": counts
     }
 
@@ -3,15 +3,141 @@ Entrance/Exit Analytics Engine
 
 Processes person centroid events to detect line crossings and emit IN/OUT events.
 """
-from typing import Dict, Optional, Any
-from datetime import datetime
+from typing import Dict, List, Optional, Any
+import logging
+import threading
 import time
-from app.geometry_utils import detect_line_crossing, should_count_crossing, get_point_side_of_line
-from app.db.crud.entry_exit_event import create_entry_exit_event
+
+import numpy as np
+
+from app.geometry_utils import (
+    detect_line_crossing,
+    should_count_crossing,
+    get_point_side_of_line,
+    line_coefficients,
+    reset_track_state,
+)
+from app.services.kernels import detect_crossings, CROSS_NONE, CROSS_OUT
+from app.db.crud.entry_exit_event import create_entry_exit_events_bulk_epoch
 from sqlalchemy.orm import Session
 
-# Track last position per track_id: {track_id: {'x': float, 'y': float, 'timestamp': float}}
-track_positions: Dict[int, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
+
+# Detected events pending insertion, as plain mapping dicts with epoch-float
+# timestamps - the datetime objects are only materialized at flush time, so
+# the per-event hot path allocates no GC-tracked datetime. Crossings are
+# buffered here and written with one multi-values INSERT per flush instead
+# of an INSERT+commit per event - the coordinator flushes once per polling
+# iteration (~1s) or as soon as the buffer fills. The coordinator runs
+# flushes on worker threads (and a periodic flusher may overlap a payload
+# flush), so appends and the buffer swap are guarded by a lock - an
+# unlocked append could land between the flush's copy and clear and be
+# dropped. Crossings are rare, so the lock is uncontended in practice;
+# the INSERT itself runs outside it.
+_event_buffer: List[Dict[str, Any]] = []
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+_FLUSH_MAX_EVENTS = 32
+_FLUSH_MAX_AGE = 1.0  # seconds
+
+
+def flush_event_buffer(db: Session, force: bool = False) -> int:
+    """
+    Write buffered events to the database if the flush threshold is met.
+
+    Flushes when the buffer holds _FLUSH_MAX_EVENTS or more, when the
+    buffer is older than _FLUSH_MAX_AGE seconds, or when force is True
+    (e.g. on coordinator shutdown). Safe to call from concurrent worker
+    threads: the buffer is snapshotted and cleared under a lock, so each
+    event is written exactly once. Returns the number of rows written.
+    """
+    global _last_flush
+    with _buffer_lock:
+        if not _event_buffer:
+            _last_flush = time.monotonic()
+            return 0
+        if not (
+            force
+            or len(_event_buffer) >= _FLUSH_MAX_EVENTS
+            or time.monotonic() - _last_flush > _FLUSH_MAX_AGE
+        ):
+            return 0
+        rows = _event_buffer.copy()
+        _event_buffer.clear()
+        _last_flush = time.monotonic()
+    return create_entry_exit_events_bulk_epoch(db, rows)
+
+# Last known position per track, stored structure-of-arrays: one compact
+# slot per track across three parallel arrays plus a track_id -> slot map.
+# A dict-of-dicts costs ~300 bytes per track (dict header + boxed floats);
+# a slot costs 16 bytes here, and keeping each attribute contiguous lets
+# the batch path gather/scatter positions with NumPy fancy indexing
+# instead of per-track dict lookups. Freed slots are recycled through a
+# free-list; the arrays double on demand.
+_INITIAL_SLOT_CAPACITY = 1024
+
+_pos_x = np.empty(_INITIAL_SLOT_CAPACITY, dtype=np.float32)
+_pos_y = np.empty(_INITIAL_SLOT_CAPACITY, dtype=np.float32)
+_pos_t = np.empty(_INITIAL_SLOT_CAPACITY, dtype=np.float64)
+_slot_of: Dict[int, int] = {}
+_free_slots: list = []
+_next_slot = 0
+
+
+def _assign_slot(track_id: int) -> int:
+    """Assign a position slot to a new track, growing the arrays if full"""
+    global _pos_x, _pos_y, _pos_t, _next_slot
+    if _free_slots:
+        slot = _free_slots.pop()
+    else:
+        slot = _next_slot
+        _next_slot += 1
+        if slot >= len(_pos_x):
+            _pos_x = np.resize(_pos_x, len(_pos_x) * 2)
+            _pos_y = np.resize(_pos_y, len(_pos_y) * 2)
+            _pos_t = np.resize(_pos_t, len(_pos_t) * 2)
+    _slot_of[track_id] = slot
+    return slot
+
+
+def _release_slot(track_id: int):
+    """Return a track's slot to the free-list"""
+    slot = _slot_of.pop(track_id, None)
+    if slot is not None:
+        _free_slots.append(slot)
+
+
+# Tracks that stop appearing (person left the frame, tracker lost them) are
+# never explicitly cleared by the polling path, so without eviction the
+# slot map grows with every transient track of the day. A periodic sweep
+# drops tracks not seen for _TRACK_TTL seconds, keeping the arrays small
+# enough to stay cache-resident. Timestamps compare against the same
+# detection-time clock the positions are stored with.
+_TRACK_TTL = 30.0  # seconds
+_SWEEP_INTERVAL = 5.0  # seconds
+_last_sweep = 0.0
+
+
+def _sweep_stale_tracks(now: float):
+    """Evict tracks whose last position is older than _TRACK_TTL"""
+    global _last_sweep
+    if now - _last_sweep < _SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    if not _slot_of:
+        return
+
+    # One vectorized age check over every live slot; only the stale
+    # minority is touched in Python
+    items = list(_slot_of.items())
+    slots = np.fromiter((slot for _, slot in items), dtype=np.int64, count=len(items))
+    stale = _pos_t[slots] < now - _TRACK_TTL
+    for idx in np.nonzero(stale)[0]:
+        track_id, slot = items[idx]
+        del _slot_of[track_id]
+        _free_slots.append(slot)
+        # Drop the debounce row too so that state stays bounded as well
+        reset_track_state(track_id)
 
 
 def process_person_centroid(
@@ -45,23 +171,25 @@ def process_person_centroid(
     if timestamp is None:
         timestamp = time.time()
     
-    # Get previous position for this track
-    prev_position = track_positions.get(track_id)
-    
+    # Get previous position for this track (before overwriting its slot)
+    slot = _slot_of.get(track_id)
+    if slot is None:
+        prev_point = None
+        slot = _assign_slot(track_id)
+    else:
+        prev_point = {'x': float(_pos_x[slot]), 'y': float(_pos_y[slot])}
+
     # Update current position
-    current_position = {
-        'x': centroid_x,
-        'y': centroid_y,
-        'timestamp': timestamp
-    }
-    track_positions[track_id] = current_position
-    
+    _pos_x[slot] = centroid_x
+    _pos_y[slot] = centroid_y
+    _pos_t[slot] = timestamp
+    _sweep_stale_tracks(timestamp)
+
     # Need previous position to detect crossing
-    if prev_position is None:
+    if prev_point is None:
         return None
-    
+
     # Detect line crossing
-    prev_point = {'x': prev_position['x'], 'y': prev_position['y']}
     curr_point = {'x': centroid_x, 'y': centroid_y}
     
     direction = detect_line_crossing(prev_point, curr_point, line_config)
@@ -103,22 +231,20 @@ def process_person_centroid(
     if not should_count_crossing(track_id, direction, timestamp):
         return None
     
-    # Create event
-    event_data = {
-        "camera_id": camera_id,
-        "event": event_type,
-        "timestamp": datetime.fromtimestamp(timestamp),
-        "track_id": track_id
-    }
-    
-    # Persist to database
-    from app.db.schemas.entry_exit_event import EntryExitEventCreate
-    event_create = EntryExitEventCreate(**event_data)
-    db_event = create_entry_exit_event(db, event_create)
-    
-    # Log the event
-    print(f"🚪 ENTRANCE/EXIT EVENT: camera_id={camera_id}, event={event_type}, track_id={track_id}, timestamp={int(timestamp)}")
-    
+    # Buffer the event for the next bulk flush (epoch float; converted to
+    # datetime once at flush time)
+    with _buffer_lock:
+        _event_buffer.append({
+            "camera_id": camera_id,
+            "event": event_type,
+            "timestamp": timestamp,
+            "track_id": track_id
+        })
+
+    # Log the event - %s-lazy so quiet levels skip the formatting entirely
+    logger.info("Entrance/exit event: camera_id=%s, event=%s, track_id=%s, timestamp=%s",
+                camera_id, event_type, track_id, int(timestamp))
+
     # Return event for real-time processing
     return {
         "camera_id": camera_id,
@@ -128,18 +254,178 @@ def process_person_centroid(
     }
 
 
+def process_person_centroids_batch(
+    db: Session,
+    camera_id: int,
+    detections: List[Dict[str, Any]],
+    line_config: Dict[str, float],
+    direction_filter: str = "both",
+    entrance_side_point: Optional[Dict[str, float]] = None,
+    coeffs: Optional[tuple] = None,
+    entrance_sign: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Process one camera's batch of person detections in vectorized form.
+
+    Centroid math and crossing detection - the per-detection hot path - run
+    as NumPy array ops over the whole batch instead of per-track Python
+    float math. Actual crossings are rare (a handful per second at most),
+    so the event-emission tail stays scalar and shares its semantics with
+    process_person_centroid.
+
+    Args:
+        db: Database session
+        camera_id: Camera ID
+        detections: Raw detection dicts with "track_id", "bbox" [x1,y1,x2,y2]
+                    and optional "timestamp"
+        line_config: Line definition {'x1', 'y1', 'x2', 'y2'}
+        direction_filter: Which directions to count ("in", "out", "both")
+        entrance_side_point: Optional reference point on the entrance side
+        coeffs: Optional precomputed (A, B, C) implicit-line coefficients
+                for line_config; pass them when the line is fixed across
+                calls (the polling coordinator computes them once per
+                config change) so they aren't rederived every batch
+        entrance_sign: Optional precomputed side value of
+                       entrance_side_point (A*x + B*y + C); same idea
+
+    Returns:
+        List of emitted event dicts (same shape as process_person_centroid)
+    """
+    events: List[Dict[str, Any]] = []
+    track_ids: List[int] = []
+    bboxes: List[List[float]] = []
+    times: List[float] = []
+    now = time.time()
+    for det in detections:
+        track_id = det.get("track_id")
+        bbox = det.get("bbox", [])
+        if track_id is None or len(bbox) != 4:
+            continue
+        track_ids.append(track_id)
+        bboxes.append(bbox)
+        timestamp = det.get("timestamp")
+        times.append(now if timestamp is None else timestamp)
+    if not track_ids:
+        return events
+
+    # Centroids for the whole batch: (x1+x2)/2, (y1+y2)/2
+    bbox_arr = np.asarray(bboxes, dtype=np.float64)
+    centroids = (bbox_arr[:, [0, 1]] + bbox_arr[:, [2, 3]]) * 0.5
+
+    # Resolve each track's position slot, allocating for first-seen tracks
+    n = len(track_ids)
+    slots = np.empty(n, dtype=np.int64)
+    has_prev = np.zeros(n, dtype=bool)
+    for i, track_id in enumerate(track_ids):
+        slot = _slot_of.get(track_id)
+        if slot is None:
+            slot = _assign_slot(track_id)
+        else:
+            has_prev[i] = True
+        slots[i] = slot
+
+    # Gather previous positions, then scatter the current ones in - both
+    # as single fancy-indexing ops over the SoA buffers
+    prev = np.empty((n, 2), dtype=np.float64)
+    prev[:, 0] = _pos_x[slots]
+    prev[:, 1] = _pos_y[slots]
+    _pos_x[slots] = centroids[:, 0]
+    _pos_y[slots] = centroids[:, 1]
+    _pos_t[slots] = times
+    # Sweep against the batch's newest detection timestamp, not wall clock:
+    # _pos_t stores detection-time values, and if the inference stream lags
+    # or replays by more than _TRACK_TTL, ageing them against time.time()
+    # would evict every live track. Same clock as the scalar path.
+    _sweep_stale_tracks(max(times))
+    if not has_prev.any():
+        return events
+
+    # Crossing detection runs in the compiled kernel over the raw columns;
+    # rows without history compute garbage and are masked out after
+    if coeffs is None:
+        coeffs = line_coefficients(line_config)
+    A, B, C = coeffs
+    cross_codes = np.empty(n, dtype=np.uint8)
+    detect_crossings(
+        prev[:, 0], prev[:, 1], centroids[:, 0], centroids[:, 1],
+        A, B, C, cross_codes
+    )
+    cross_codes[~has_prev] = CROSS_NONE
+
+    # Entrance side sign, derived from the implicit line unless the caller
+    # already precomputed it
+    if entrance_sign is None:
+        entrance_sign = 0.0
+        if entrance_side_point:
+            entrance_sign = A * entrance_side_point['x'] + B * entrance_side_point['y'] + C
+
+    # Scalar tail over the (rare) crossings only
+    for i in range(n):
+        code = cross_codes[i]
+        if code == CROSS_NONE:
+            continue
+        direction = "OUT" if code == CROSS_OUT else "IN"
+
+        if entrance_sign != 0.0:
+            prev_sign = A * prev[i, 0] + B * prev[i, 1] + C
+            if prev_sign != 0.0:
+                # Coming from the entrance side means entering
+                event_type = "enter" if (prev_sign > 0) == (entrance_sign > 0) else "exit"
+            else:
+                event_type = "enter" if direction == "IN" else "exit"
+        else:
+            event_type = "enter" if direction == "IN" else "exit"
+
+        if direction_filter == "in" and event_type != "enter":
+            continue
+        if direction_filter == "out" and event_type != "exit":
+            continue
+
+        if not should_count_crossing(track_ids[i], direction, times[i]):
+            continue
+
+        with _buffer_lock:
+            _event_buffer.append({
+                "camera_id": camera_id,
+                "event": event_type,
+                "timestamp": times[i],
+                "track_id": track_ids[i]
+            })
+
+        logger.info("Entrance/exit event: camera_id=%s, event=%s, track_id=%s, timestamp=%s",
+                    camera_id, event_type, track_ids[i], int(times[i]))
+
+        events.append({
+            "camera_id": camera_id,
+            "event": event_type,
+            "timestamp": int(times[i]),
+            "track_id": track_ids[i]
+        })
+
+    return events
+
+
 def clear_track_position(track_id: int):
     """Clear the stored position for a track (e.g., when track ends)"""
-    if track_id in track_positions:
-        del track_positions[track_id]
+    _release_slot(track_id)
 
 
 def clear_all_track_positions():
     """Clear all stored track positions"""
-    track_positions.clear()
+    global _next_slot
+    _slot_of.clear()
+    _free_slots.clear()
+    _next_slot = 0
 
 
 def get_track_position(track_id: int) -> Optional[Dict[str, Any]]:
     """Get the current position for a track"""
-    return track_positions.get(track_id)
+    slot = _slot_of.get(track_id)
+    if slot is None:
+        return None
+    return {
+        'x': float(_pos_x[slot]),
+        'y': float(_pos_y[slot]),
+        'timestamp': float(_pos_t[slot])
+    }
 